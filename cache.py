@@ -0,0 +1,88 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+import pandas as pd
+
+CACHE_DIR = ".cache"
+
+# Filer ældre end dette slettes – skal være længere end den længste TTL (S&P500: 30 dage)
+CACHE_RETENTION = 60*60*24*45
+SWEEP_INTERVAL = 60*60
+
+_last_sweep = 0.0
+
+def key(*parts) -> str:
+    """
+    Stabil, filnavnsvenlig nøgle: MD5 af delene joinet med "|".
+    """
+    return hashlib.md5("|".join(map(str, parts)).encode()).hexdigest()
+
+def path(name: str, ext: str) -> str:
+    return os.path.join(CACHE_DIR, f"{name}.{ext}")
+
+def load(path: str, ttl: int | None = None):
+    """
+    Læser en cachefil: .parquet -> DataFrame, .json -> gemt værdi.
+    Return: None hvis filen mangler, er ældre end ttl sekunder eller er ulæselig.
+    """
+    try:
+        if ttl is not None and (time.time() - os.path.getmtime(path)) >= ttl:
+            return None
+        if path.endswith(".parquet"):
+            return pd.read_parquet(path)
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+def save(path: str, value) -> None:
+    """
+    Skriver value (DataFrame -> .parquet, ellers JSON) atomisk: unik temp-fil pr.
+    skrivning og os.replace, så samtidige skrivere/læsere aldrig ser en halv fil.
+    Fejl ignoreres – cachen er kun en genvej.
+    """
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        try:
+            if path.endswith(".parquet"):
+                os.close(fd)
+                value.to_parquet(tmp)
+            else:
+                with os.fdopen(fd, "w", encoding="utf-8") as f:
+                    json.dump(value, f, ensure_ascii=False)
+            os.replace(tmp, path)
+        except Exception:
+            os.remove(tmp)
+            raise
+    except Exception:
+        pass
+    _maybe_sweep()
+
+def sweep(max_age: int = CACHE_RETENTION) -> None:
+    """
+    Sletter filer i CACHE_DIR, der ikke er skrevet i max_age sekunder
+    (dags-/månedsnøglede filer, efterladte temp-filer).
+    """
+    now = time.time()
+    try:
+        entries = list(os.scandir(CACHE_DIR))
+    except OSError:
+        return
+    for e in entries:
+        try:
+            if e.is_file() and now - e.stat().st_mtime > max_age:
+                os.remove(e.path)
+        except OSError:
+            pass
+
+def _maybe_sweep() -> None:
+    # Højst én oprydning pr. SWEEP_INTERVAL pr. proces
+    global _last_sweep
+    now = time.time()
+    if now - _last_sweep >= SWEEP_INTERVAL:
+        _last_sweep = now
+        sweep()
@@ -1,13 +1,19 @@
 import os
-import time
-from datetime import datetime, timezone
-import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, time as dtime, timedelta, timezone
+from io import BytesIO
+from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
-import requests
 import streamlit as st
+from lxml import etree
 import yfinance as yf
 
+import cache
+from engine import cached_download
+from http_session import make_session
+
 
 # ----------------------------
 # App config
@@ -21,6 +27,30 @@ st.title("📊 Nordnet-style Investment Dashboard")
 # ----------------------------
 PORTFOLIO_FILE = "data/portfolio_alloc.csv"
 
+# Tema-radar: tema -> ETF-proxy, målt mod BASE
+THEMES = pd.DataFrame([
+    ("AI & Software", "QQQ"),
+    ("Semiconductors", "SOXX"),
+    ("Elektrificering & batterier", "LIT"),
+    ("Grøn energi", "ICLN"),
+    ("Solenergi", "TAN"),
+    ("Defense/Aerospace", "ITA"),
+    ("Robotics/Automation", "BOTZ"),
+    ("Rumd / Space", "ARKX"),
+    ("Cybersecurity", "HACK"),
+], columns=["Tema", "Ticker"])
+BASE = "SPY"
+# Færdig (hashbar, dublet-fri) tuple ved import – bruges direkte som cache-nøgle
+THEME_TICKERS = tuple(dict.fromkeys([BASE, *THEMES["Ticker"]]))
+assert len(THEME_TICKERS) > 1  # multi-ticker download -> "Close" er altid en DataFrame
+
+# Graf-perioder: vi henter altid MAX_CHART_PERIOD og skærer til i hukommelsen
+CHART_PERIOD_DAYS = {"6mo": 182, "1y": 365, "2y": 730, "5y": 1826}
+MAX_CHART_PERIOD = "5y"
+
+# Delt session til vores egne Yahoo-kald (søgning + RSS)
+HTTP_SESSION = make_session()
+
 def now_utc():
     return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M UTC")
 
@@ -28,7 +58,12 @@ def load_portfolio_alloc() -> pd.DataFrame:
     if not os.path.exists(PORTFOLIO_FILE):
         return pd.DataFrame(columns=["name", "ticker", "weight_pct"])
 
-    df = pd.read_csv(PORTFOLIO_FILE)
+    # mtime i cache-nøglen: filen læses kun igen, når den er ændret
+    return _load_portfolio_cached(PORTFOLIO_FILE, os.path.getmtime(PORTFOLIO_FILE))
+
+@st.cache_data(show_spinner=False)
+def _load_portfolio_cached(path: str, mtime: float) -> pd.DataFrame:
+    df = pd.read_csv(path)
     # Normalize columns
     expected = {"name", "ticker", "weight_pct"}
     for col in expected:
@@ -42,18 +77,38 @@ def load_portfolio_alloc() -> pd.DataFrame:
     # Keep order as in file
     return df[["name", "ticker", "weight_pct"]]
 
-@st.cache_data(ttl=60*30)
 def batch_daily_prices(tickers: list[str]) -> pd.DataFrame:
     """
     Henter dagskurser for mange tickers i ét kald (hurtigere/mer stabilt).
     Return: DataFrame med kolonner: ticker, last, prev_close, chg, chg_pct
     """
-    tickers = [t for t in tickers if t and t != "CASH"]
+    tickers = tuple(t for t in tickers if t and t != "CASH")
     if not tickers:
         return pd.DataFrame(columns=["ticker", "last", "prev_close", "chg", "chg_pct"])
 
-    # 5 dage for at sikre vi har "i går"
-    data = yf.download(tickers, period="5d", interval="1d", auto_adjust=True, progress=False)
+    cols, last, prev = _batch_daily_prices_raw(tickers)
+    chg = last - prev
+    with np.errstate(divide="ignore", invalid="ignore"):
+        chg_pct = np.where(prev != 0, chg / prev, 0.0)
+
+    return pd.DataFrame({
+        "ticker": cols,
+        "last": last,
+        "prev_close": prev,
+        "chg": chg,
+        "chg_pct": chg_pct,
+    })
+
+@st.cache_data(ttl=60*30)
+def _batch_daily_prices_raw(tickers: tuple) -> tuple[tuple, np.ndarray, np.ndarray]:
+    """
+    Cachet del af batch_daily_prices: tuple ind, (tickers, last, prev) som numpy ud –
+    billigere at hashe og pickle end en DataFrame. DataFrame bygges hos kalderen.
+    """
+    empty = ((), np.empty(0), np.empty(0))
+
+    # 5 dage for at sikre vi har "i går" – via engine's Parquet-cache, så en kold worker ikke rammer Yahoo
+    data = cached_download(list(tickers), period="5d")
 
     # yfinance returnerer ofte multiindex kolonner når flere tickers
     # Vi prøver at få "Close" ud robust:
@@ -66,29 +121,70 @@ def batch_daily_prices(tickers: list[str]) -> pd.DataFrame:
         closes = data[["Close"]].rename(columns={"Close": tickers[0]})
 
     if closes is None or closes.empty:
-        return pd.DataFrame(columns=["ticker", "last", "prev_close", "chg", "chg_pct"])
+        return empty
 
     closes = closes.dropna(how="all")
     if len(closes) < 2:
-        return pd.DataFrame(columns=["ticker", "last", "prev_close", "chg", "chg_pct"])
+        return empty
 
-    last_row = closes.iloc[-1]
-    prev_row = closes.iloc[-2]
+    # Kolonnevis i stedet for try/except pr. ticker
+    last = pd.to_numeric(closes.iloc[-1], errors="coerce").to_numpy(dtype=float)
+    prev = pd.to_numeric(closes.iloc[-2], errors="coerce").to_numpy(dtype=float)
+    return tuple(closes.columns.astype(str)), last, prev
 
-    out = []
-    for t in closes.columns:
-        try:
-            last = float(last_row[t])
-            prev = float(prev_row[t])
-            chg = last - prev
-            chg_pct = (chg / prev) if prev != 0 else 0.0
-            out.append([t, last, prev, chg, chg_pct])
-        except Exception:
-            continue
+def slice_period(px: pd.DataFrame, period: str) -> pd.DataFrame:
+    """
+    Skærer en (5 års) kurshistorik ned til graf-perioden via DatetimeIndex.
+    """
+    days = CHART_PERIOD_DAYS.get(period)
+    if px.empty or days is None:
+        return px
+    return px.loc[px.index >= px.index.max() - pd.Timedelta(days=days)]
+
+# Daglige bars over 5 år: samme døgn-TTL som disk-cachen for lang historik
+@st.cache_data(ttl=60*60*24)
+def download_close_5y(ticker: str) -> pd.DataFrame:
+    return cached_download(ticker, period=MAX_CHART_PERIOD)
+
+def download_close_cached(ticker: str, period: str) -> pd.DataFrame:
+    """
+    Kurshistorik for én ticker (søgning + hurtig ticker-check).
+    Der hentes altid 5 år, så skift af periode ikke giver nye netværkskald.
+    """
+    return slice_period(download_close_5y(ticker), period)
+
+@st.cache_data(ttl=60*60*24)
+def download_close_batch_5y(tickers: tuple) -> dict[str, pd.DataFrame]:
+    """
+    Henter 5 års kurshistorik for mange tickers i ét (disk-cachet) kald og deler den
+    op pr. ticker, så skift mellem grafer ikke giver nye netværkskald.
+    Return: dict ticker -> DataFrame (Close, High, ... som kolonner)
+    """
+    tickers = [t for t in tickers if t and t != "CASH"]
+    if not tickers:
+        return {}
 
-    return pd.DataFrame(out, columns=["ticker", "last", "prev_close", "chg", "chg_pct"])
+    data = cached_download(tickers, period=MAX_CHART_PERIOD)
+    if data is None or data.empty:
+        return {}
 
-@st.cache_data(ttl=60*60*24*7)
+    out = {}
+    if isinstance(data.columns, pd.MultiIndex):
+        # Kolonner er (Price, Ticker) – én ticker ad gangen skæres ud af sidste niveau
+        present = set(data.columns.get_level_values(-1))
+        for t in tickers:
+            if t in present:
+                out[t] = data.xs(t, axis=1, level=-1).dropna(how="all")
+    else:
+        # single ticker
+        out[tickers[0]] = data
+    return out
+
+def _json_cache_path(kind: str, key: str) -> str:
+    # Disk-cache (JSON) under st.cache_data, så Yahoo-opslag overlever genstart
+    return cache.path(f"{kind}_{cache.key(key)}", "json")
+
+@st.cache_data(ttl=60*60*24*7, show_spinner=False)
 def get_sector_cached(ticker: str) -> str:
     """
     Sektor er langsom at hente, så vi cacher 7 dage.
@@ -97,6 +193,10 @@ def get_sector_cached(ticker: str) -> str:
     if not ticker or ticker == "CASH":
         return "Kontanter"
 
+    cached = cache.load(_json_cache_path("sector", ticker), ttl=60*60*24*7)
+    if cached is not None:
+        return cached
+
     try:
         info = yf.Ticker(ticker).info or {}
         # Aktier:
@@ -104,9 +204,25 @@ def get_sector_cached(ticker: str) -> str:
         # ETF/fund:
         if not sector:
             sector = info.get("category") or info.get("fundFamily") or info.get("quoteType")
-        return str(sector) if sector else "Ukendt"
+        sector = str(sector) if sector else "Ukendt"
     except Exception:
-        return "Ukendt"
+        return "Ukendt"  # fejl gemmes ikke på disk – næste genstart prøver igen
+    cache.save(_json_cache_path("sector", ticker), sector)
+    return sector
+
+def _fetch_sectors(tickers: list[str]) -> dict[str, str]:
+    """
+    Slår sektorer op parallelt – ved kold cache er hvert opslag et .info-kald mod Yahoo.
+    Dubletter fjernes først, så cache-hits genbruges. Tom ticker/CASH
+    er altid "Kontanter" og rammer hverken cache eller Yahoo.
+    """
+    tickers = list(dict.fromkeys(tickers))
+    out = {t: "Kontanter" for t in tickers if not t or t == "CASH"}
+    lookup = [t for t in tickers if t not in out]
+    if lookup:
+        with ThreadPoolExecutor(max_workers=min(16, len(lookup))) as ex:
+            out.update(zip(lookup, ex.map(get_sector_cached, lookup)))
+    return out
 
 @st.cache_data(ttl=60*30)
 def yahoo_search(query: str) -> pd.DataFrame:
@@ -116,65 +232,73 @@ def yahoo_search(query: str) -> pd.DataFrame:
     if not query or len(query) < 2:
         return pd.DataFrame(columns=["symbol", "name", "exch", "type"])
 
-    url = "https://query2.finance.yahoo.com/v1/finance/search"
-    params = {"q": query, "quotesCount": 12, "newsCount": 0}
-    r = requests.get(url, params=params, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
-    r.raise_for_status()
-    js = r.json()
-
-    rows = []
-    for q in js.get("quotes", []):
-        rows.append([
-            q.get("symbol", ""),
-            q.get("shortname", "") or q.get("longname", ""),
-            q.get("exchDisp", "") or q.get("exchange", ""),
-            q.get("quoteType", "")
-        ])
+    rows = cache.load(_json_cache_path("search", query), ttl=60*30)
+    if rows is None:
+        url = "https://query2.finance.yahoo.com/v1/finance/search"
+        params = {"q": query, "quotesCount": 12, "newsCount": 0}
+        r = HTTP_SESSION.get(url, params=params, timeout=15)
+        r.raise_for_status()
+        js = r.json()
+
+        rows = []
+        for q in js.get("quotes", []):
+            rows.append([
+                q.get("symbol", ""),
+                q.get("shortname", "") or q.get("longname", ""),
+                q.get("exchDisp", "") or q.get("exchange", ""),
+                q.get("quoteType", "")
+            ])
+        cache.save(_json_cache_path("search", query), rows)
     return pd.DataFrame(rows, columns=["symbol", "name", "exch", "type"])
 
-@st.cache_data(ttl=60*15)
-def yahoo_news_rss(ticker: str, limit: int = 8) -> list[dict]:
-    """
-    Henter seneste nyheder via Yahoo RSS.
-    """
-    if not ticker or ticker == "CASH":
+def _fetch_news_rss(ticker: str, limit: int) -> list[dict]:
+    if not ticker or ticker == "CASH" or limit <= 0:
         return []
 
+    cache_key = f"{ticker}|{limit}"
+    cached = cache.load(_json_cache_path("rss", cache_key), ttl=60*15)
+    if cached is not None:
+        return cached
+
     rss_url = f"https://feeds.finance.yahoo.com/rss/2.0/headline?s={ticker}&region=US&lang=en-US"
     try:
-        r = requests.get(rss_url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
+        r = HTTP_SESSION.get(rss_url, timeout=15)
         if r.status_code != 200:
             return []
-        root = ET.fromstring(r.text)
-        items = root.findall(".//item")
+        # Streaming-parse: kun <item>-elementer, som ryddes løbende, og stop ved limit
         out = []
-        for it in items[:limit]:
+        for _, it in etree.iterparse(BytesIO(r.content), tag="item", resolve_entities=False):
             title = (it.findtext("title") or "").strip()
             link = (it.findtext("link") or "").strip()
             pub = (it.findtext("pubDate") or "").strip()
             out.append({"title": title, "link": link, "pubDate": pub})
+            it.clear()
+            if len(out) >= limit:
+                break
+        cache.save(_json_cache_path("rss", cache_key), out)
         return out
     except Exception:
         return []
 
-def format_pct(x: float) -> str:
-    try:
-        return f"{x*100:.2f}%"
-    except Exception:
-        return ""
-
-def format_dkk(x) -> str:
-    try:
-        return f"{float(x):,.2f}"
-    except Exception:
-        return ""
+@st.cache_data(ttl=60*15)
+def yahoo_news_rss(ticker: str, limit: int = 8) -> list[dict]:
+    """
+    Henter seneste nyheder via Yahoo RSS.
+    """
+    return _fetch_news_rss(ticker, limit)
 
-def sign_emoji(x: float) -> str:
-    if x > 0:
-        return "🟢"
-    if x < 0:
-        return "🔴"
-    return "⚪"
+@st.cache_data(ttl=60*15)
+def yahoo_news_rss_batch(tickers: tuple, limit: int = 8) -> dict[str, list[dict]]:
+    """
+    Henter nyheder for mange tickers samtidigt (trådpulje over den delte session),
+    så skift mellem instrumenter kun er et opslag.
+    Return: dict ticker -> liste af nyheder
+    """
+    tickers = [t for t in dict.fromkeys(tickers) if t and t != "CASH"]
+    if not tickers:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(16, len(tickers))) as ex:
+        return dict(zip(tickers, ex.map(lambda t: _fetch_news_rss(t, limit), tickers)))
 
 def build_portfolio_table(df_port: pd.DataFrame) -> pd.DataFrame:
     """
@@ -184,18 +308,21 @@ def build_portfolio_table(df_port: pd.DataFrame) -> pd.DataFrame:
     px = batch_daily_prices(tickers)
 
     merged = df_port.merge(px, how="left", on="ticker")
-    merged["sector"] = merged["ticker"].apply(get_sector_cached)
+    merged["sector"] = merged["ticker"].map(_fetch_sectors(merged["ticker"].tolist()))
 
-    merged["chg_pct"] = merged["chg_pct"].fillna(0.0)
-    merged["chg"] = merged["chg"].fillna(0.0)
-    merged["last"] = merged["last"].fillna(float("nan"))
+    # Manglende/ugyldig ændring -> 0 i ét numpy-kald ("last" forbliver NaN -> "-")
+    chg = merged[["chg_pct", "chg"]].to_numpy(dtype=float)
+    merged[["chg_pct", "chg"]] = np.where(np.isfinite(chg), chg, 0.0)
 
     # Kolonner som “Nordnet-ish”
-    merged["I dag"] = merged["chg_pct"].apply(lambda v: f"{sign_emoji(v)} {v*100:+.2f}%")
-    merged["Kurs"] = merged["last"].apply(lambda v: "-" if pd.isna(v) else f"{v:.2f}")
+    # Vektoriseret formattering (ingen .apply pr. række)
+    pct = merged["chg_pct"].to_numpy(dtype=float)
+    emoji = np.select([pct > 0, pct < 0], ["🟢", "🔴"], "⚪")
+    merged["I dag"] = [f"{e} {v*100:+.2f}%" for e, v in zip(emoji, pct)]
+    last = merged["last"].to_numpy(dtype=float)
+    merged["Kurs"] = np.where(np.isnan(last), "-", [f"{v:.2f}" for v in last])
     merged["Ticker"] = merged["ticker"]
     merged["Navn"] = merged["name"]
-    merged["Vægt"] = merged["weight_pct"].apply(lambda v: f"{v:.2f}%")
     merged["Sektor"] = merged["sector"]
 
     # Sorter efter vægt
@@ -203,16 +330,154 @@ def build_portfolio_table(df_port: pd.DataFrame) -> pd.DataFrame:
 
     return merged
 
+def last_market_close_date() -> str:
+    """
+    Seneste US-handelsdag med lukkekurs (hverdage efter 16:30 New York-tid).
+    Helligdage ignoreres – de koster højst ét ekstra download.
+    """
+    now = datetime.now(ZoneInfo("America/New_York"))
+    d = now.date()
+    if now.time() < dtime(16, 30):
+        d -= timedelta(days=1)
+    while d.weekday() >= 5:
+        d -= timedelta(days=1)
+    return d.isoformat()
+
+@st.cache_data(ttl=60*60*24)
+def theme_radar_cached(tickers: tuple, trading_day: str) -> pd.DataFrame:
+    """
+    Momentum-score pr. tema (ETF) relativt til BASE.
+    Radaren afhænger kun af sidste lukkekurs, så resultatet gemmes på disk pr.
+    handelsdag – nat/weekend serveres fra Parquet uden kald til Yahoo.
+    Raises RuntimeError hvis der ikke kan hentes nok data – st.cache_data gemmer
+    ikke undtagelser, så næste rerun prøver Yahoo igen i stedet for at vise et tomt radar-kort.
+    """
+    path = cache.path(f"theme_radar_{trading_day}_{cache.key(*tickers)[:8]}", "parquet")
+    df = cache.load(path)
+    if df is not None:
+        return df
+
+    df = _compute_theme_radar(tickers, trading_day)
+    if df.empty:
+        raise RuntimeError("Ikke nok kursdata til tema-radar")
+    cache.save(path, df)
+    return df
+
+def _total_return(arr: np.ndarray, days: int) -> np.ndarray:
+    """
+    Afkast over `days` rækker for alle kolonner: sidste / (days rækker før) - 1.
+    Samme tal som pct_change(days).iloc[-1], men uden at bygge hele matricen.
+    """
+    if len(arr) <= days:
+        return np.full(arr.shape[1], np.nan)
+    return arr[-1] / arr[-1 - days] - 1
+
+def _compute_theme_radar(tickers: tuple, trading_day: str) -> pd.DataFrame:
+    px = yf.download(list(tickers), period="1y", auto_adjust=True, progress=False)["Close"]
+    # Skær til trading_day: intradag kan der ligge en delvis bar for i dag, og den
+    # må ikke ende i den disk-cachefil, der er nøglet på sidste lukkedag
+    px = px[px.index.date <= pd.Timestamp(trading_day).date()]
+    # Udfyld korte huller (fx forskellige helligdage) i stedet for at smide hele rækker væk
+    px = px.ffill(limit=2).dropna(how="all")
+
+    if BASE not in px.columns:
+        return pd.DataFrame()
+    px = px[px[BASE].notna()]
+    if len(px) < 80:
+        return pd.DataFrame()
+
+    # To rækker pr. horisont for alle tickers på én gang
+    arr = px.to_numpy(dtype=float)
+    ret_1m = _total_return(arr, 21)
+    ret_3m = _total_return(arr, 63)
+
+    # Positionsopslag én gang – resten er ren array-aritmetik
+    th = THEMES[THEMES["Ticker"].isin(px.columns)]
+    idx = px.columns.get_indexer(th["Ticker"])
+    base_i = px.columns.get_loc(BASE)
+
+    rs_1m = ret_1m[idx] - ret_1m[base_i]
+    rs_3m = ret_3m[idx] - ret_3m[base_i]
+
+    df = pd.DataFrame({
+        "Tema": th["Tema"].to_numpy(),
+        "Ticker": th["Ticker"].to_numpy(),
+        "MomentumScore": 60 * rs_3m + 40 * rs_1m,
+        "RS_1M_vs_SPY": rs_1m,
+        "RS_3M_vs_SPY": rs_3m,
+    })
+    return df.sort_values("MomentumScore", ascending=False)
+
 
 # ----------------------------
 # Sidebar
 # ----------------------------
 st.sidebar.header("Indstillinger")
 top_news = st.sidebar.slider("Antal nyheder pr instrument", 3, 15, 6)
-chart_period = st.sidebar.selectbox("Standard periode (graf)", ["6mo", "1y", "2y", "5y"], index=1)
+chart_period = st.sidebar.selectbox("Standard periode (graf)", list(CHART_PERIOD_DAYS), index=1)
 st.sidebar.caption(f"Opdateret: {now_utc()}")
 
 
+# ----------------------------
+# Detaljeblokke (graf + nyheder)
+# ----------------------------
+def render_price_chart(px: pd.DataFrame, empty_msg: str):
+    if not px.empty and "Close" in px.columns:
+        st.line_chart(px["Close"])
+    else:
+        st.warning(empty_msg)
+
+def render_news(news: list[dict], empty_msg: str):
+    st.markdown("### Seneste nyheder")
+    if not news:
+        st.info(empty_msg)
+    else:
+        for n in news:
+            # Streamlit linker fint med markdown
+            st.markdown(f"- [{n['title']}]({n['link']})  \n  _{n['pubDate']}_")
+
+# st.fragment: nyt valg i dropdown genkører kun blokken, ikke hele siden.
+@st.fragment
+def portfolio_details(table: pd.DataFrame, period: str, n_news: int):
+    # Dropdown med navn + ticker
+    opts = table[table["Ticker"] != ""]
+    labels = (opts["Navn"] + " — " + opts["Ticker"]).tolist()
+    tick_by_label = dict(zip(labels, opts["Ticker"]))
+    pick = st.selectbox("Vælg instrument", labels, index=0 if labels else None)
+
+    # Fragment-reruns kører kun denne krop – fejl skal fanges her, ikke i fanen
+    try:
+        # Hent grafdata + nyheder for hele porteføljen på én gang – skift af instrument er så kun et opslag
+        port_tickers = tuple(sorted(set(table["Ticker"])))
+        hist = download_close_batch_5y(port_tickers)
+        news_by_ticker = yahoo_news_rss_batch(port_tickers, n_news)
+
+        if pick:
+            ticker = tick_by_label[pick]
+            st.markdown(f"## {ticker}")
+
+            # Kun det valgte instrument skæres til perioden
+            px = slice_period(hist.get(ticker, pd.DataFrame()), period)
+            render_price_chart(px, "Ingen prisdata fundet for denne ticker.")
+            render_news(news_by_ticker.get(ticker, []), "Ingen nyheder fundet (eller Yahoo RSS blokeret for denne ticker).")
+    except Exception as e:
+        st.error(f"Kunne ikke hente detaljer: {e}")
+
+@st.fragment
+def search_details(res: pd.DataFrame, period: str, n_news: int):
+    # Vælg symbol til graf/nyheder
+    sym = st.selectbox("Vælg symbol", res["symbol"].tolist())
+    st.markdown(f"## {sym}")
+
+    # Fragment-reruns kører kun denne krop – fanens try/except dækker ikke her
+    try:
+        # Kun det valgte symbol hentes (cachet i 5 år) – ikke hele søgeresultatet
+        render_price_chart(download_close_cached(sym, period), "Ingen prisdata fundet.")
+        render_news(yahoo_news_rss(sym, limit=n_news), "Ingen nyheder fundet.")
+    except Exception as e:
+        st.error(f"Søg fejlede: {e}")
+
+
 # ----------------------------
 # Tabs
 # ----------------------------
@@ -244,23 +509,17 @@ with tabs[0]:
         st.metric("Dagskurser cache", "30 min")
 
     st.markdown("### Beholdning")
-    # “Nordnet-ish” liste med progress bar
-    for _, r in table.iterrows():
-        name = r["Navn"]
-        ticker = r["Ticker"]
-        weight = float(r["weight_pct"])
-        kurs = r["Kurs"]
-        idag = r["I dag"]
-
-        left, right = st.columns([6, 2])
-        with left:
-            st.markdown(f"**{name}**  \n`{ticker}`  \n{r['Sektor']}")
-            st.progress(min(max(weight / 100.0, 0.0), 1.0))
-        with right:
-            st.markdown(f"**{weight:.2f}%**")
-            st.markdown(f"Kurs: **{kurs}**")
-            st.markdown(f"{idag}")
-        st.divider()
+    # “Nordnet-ish” liste med progress bar – én tabel i stedet for N widgets
+    st.dataframe(
+        table[["Navn", "Ticker", "Sektor", "weight_pct", "Kurs", "I dag"]],
+        column_config={
+            "weight_pct": st.column_config.ProgressColumn(
+                "Vægt", min_value=0, max_value=100, format="%.2f%%"
+            ),
+        },
+        use_container_width=True,
+        hide_index=True,
+    )
 
     st.markdown("### Sektorfordeling (baseret på dine % vægte)")
     sector_alloc = (
@@ -270,36 +529,10 @@ with tabs[0]:
         .reset_index()
         .rename(columns={"weight_pct": "Vægt %"})
     )
-    st.dataframe(sector_alloc, use_container_width=True)
+    st.dataframe(sector_alloc, use_container_width=True, hide_index=True)
 
     st.markdown("### Klik → detaljer (graf + nyheder)")
-    # Dropdown med navn + ticker
-    options = []
-    for _, r in table.iterrows():
-        if r["Ticker"]:
-            options.append(f"{r['Navn']} — {r['Ticker']}")
-    pick = st.selectbox("Vælg instrument", options, index=0 if options else None)
-
-    if pick:
-        ticker = pick.split("—")[-1].strip()
-        st.markdown(f"## {ticker}")
-
-        # Kursgraf
-        px = yf.download(ticker, period=chart_period, auto_adjust=True, progress=False)
-        if not px.empty and "Close" in px.columns:
-            st.line_chart(px["Close"])
-        else:
-            st.warning("Ingen prisdata fundet for denne ticker.")
-
-        # Nyheder
-        news = yahoo_news_rss(ticker, limit=top_news)
-        st.markdown("### Seneste nyheder")
-        if not news:
-            st.info("Ingen nyheder fundet (eller Yahoo RSS blokeret for denne ticker).")
-        else:
-            for n in news:
-                # Streamlit linker fint med markdown
-                st.markdown(f"- [{n['title']}]({n['link']})  \n  _{n['pubDate']}_")
+    portfolio_details(table, chart_period, top_news)
 
 
 # ----------------------------
@@ -315,25 +548,9 @@ with tabs[1]:
             if res.empty:
                 st.info("Ingen resultater.")
             else:
-                st.dataframe(res, use_container_width=True)
-
-                # Vælg symbol til graf/nyheder
-                sym = st.selectbox("Vælg symbol", res["symbol"].tolist())
-                st.markdown(f"## {sym}")
-
-                px = yf.download(sym, period=chart_period, auto_adjust=True, progress=False)
-                if not px.empty and "Close" in px.columns:
-                    st.line_chart(px["Close"])
-                else:
-                    st.warning("Ingen prisdata fundet.")
-
-                st.markdown("### Seneste nyheder")
-                news = yahoo_news_rss(sym, limit=top_news)
-                if not news:
-                    st.info("Ingen nyheder fundet.")
-                else:
-                    for n in news:
-                        st.markdown(f"- [{n['title']}]({n['link']})  \n  _{n['pubDate']}_")
+                st.dataframe(res, use_container_width=True, hide_index=True)
+
+                search_details(res, chart_period, top_news)
         except Exception as e:
             st.error(f"Søg fejlede: {e}")
 
@@ -341,11 +558,7 @@ with tabs[1]:
     st.subheader("📌 Hurtig ticker-check")
     manual = st.text_input("Indtast ticker direkte (Yahoo-format)", value="NVDA").strip().upper()
     if manual:
-        px = yf.download(manual, period=chart_period, auto_adjust=True, progress=False)
-        if not px.empty and "Close" in px.columns:
-            st.line_chart(px["Close"])
-        else:
-            st.warning("Ingen data – tjek tickerformat.")
+        render_price_chart(download_close_cached(manual, chart_period), "Ingen data – tjek tickerformat.")
 
 
 # ----------------------------
@@ -355,48 +568,18 @@ with tabs[2]:
     st.subheader("🧭 Tema/forecast (momentum-proxy via ETF’er)")
     st.caption("Dette er teknisk momentum-indikator (ikke rådgivning).")
 
-    themes = [
-        ("AI & Software", "QQQ"),
-        ("Semiconductors", "SOXX"),
-        ("Elektrificering & batterier", "LIT"),
-        ("Grøn energi", "ICLN"),
-        ("Solenergi", "TAN"),
-        ("Defense/Aerospace", "ITA"),
-        ("Robotics/Automation", "BOTZ"),
-        ("Rumd / Space", "ARKX"),
-        ("Cybersecurity", "HACK"),
-    ]
-
-    base = "SPY"
-    tickers = [base] + [t for _, t in themes]
-
-    px = yf.download(tickers, period="1y", auto_adjust=True, progress=False)["Close"]
-    if isinstance(px, pd.Series):
-        px = px.to_frame()
-    px = px.dropna()
-
-    if base not in px.columns or len(px) < 80:
+    try:
+        df = theme_radar_cached(THEME_TICKERS, last_market_close_date())
+    except RuntimeError:
+        df = pd.DataFrame()
+
+    if df.empty:
         st.warning("Kunne ikke hente data til tema-radar lige nu.")
     else:
-        def ret(days: int):
-            return px.pct_change(days).iloc[-1]
-
-        spy_1m = float(ret(21).get(base, 0))
-        spy_3m = float(ret(63).get(base, 0))
-
-        rows = []
-        for name, t in themes:
-            if t not in px.columns:
-                continue
-            rs_1m = float(ret(21).get(t, 0) - spy_1m)
-            rs_3m = float(ret(63).get(t, 0) - spy_3m)
-            score = 60 * rs_3m + 40 * rs_1m
-            rows.append([name, t, score, rs_1m, rs_3m])
-
-        df = pd.DataFrame(rows, columns=["Tema", "Ticker", "MomentumScore", "RS_1M_vs_SPY", "RS_3M_vs_SPY"])
-        df = df.sort_values("MomentumScore", ascending=False)
-        st.dataframe(df, use_container_width=True)
+        st.dataframe(df, use_container_width=True, hide_index=True)
 
         st.markdown("### 🔥 Temaer at kigge nærmere på (stærk relativ styrke)")
-        for _, r in df.head(6).iterrows():
-            st.markdown(f"- **{r['Tema']}** ({r['Ticker']}) — RS 1M: {r['RS_1M_vs_SPY']:+.2%}, RS 3M: {r['RS_3M_vs_SPY']:+.2%}")
+        st.markdown("\n".join(
+            f"- **{r.Tema}** ({r.Ticker}) — RS 1M: {r.RS_1M_vs_SPY:+.2%}, RS 3M: {r.RS_3M_vs_SPY:+.2%}"
+            for r in df.head(6).itertuples(index=False)
+        ))
@@ -1,88 +1,255 @@
+import functools
+from datetime import datetime, timezone
+
 import numpy as np
 import pandas as pd
+import streamlit as st
 import yfinance as yf
+from scipy.signal import lfilter
+
+import cache
 
 RSI_BUY_LOW = 35
 RSI_BUY_HIGH = 50
 RSI_TAKE_PROFIT = 70
 
-def download_close(tickers, period="2y") -> pd.DataFrame:
-    if not tickers:
-        return pd.DataFrame()
+SIGNAL_COLUMNS = [
+    "Score", "RSI", "Vol20", "Drawdown3M", "TrendUp", "A_Risk", "B_Buy", "C_Timing", "Last",
+]
+
+def _universe_tickers(universe) -> list[str]:
+    if universe is None:
+        return []
+    if isinstance(universe, list):
+        tickers = universe
+    elif "ticker" in universe.columns:
+        tickers = universe["ticker"].tolist()
+    else:
+        return []
+    return [str(t).upper().strip() for t in tickers]
+
+def disk_cache(ttl: int = 60*60*24):
+    """
+    Persistér screen_universe-resultater som Parquet i cache.CACHE_DIR.
+    Nøgle: MD5 af tickers + top_n, plus UTC-dato (signalerne er daglige),
+    så cachen overlever genstart og deles mellem processer.
+    """
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(universe, top_n: int = 10) -> pd.DataFrame:
+            tickers = _universe_tickers(universe)
+            if not tickers:
+                return fn(universe, top_n=top_n)
+
+            day = datetime.now(timezone.utc).strftime("%Y%m%d")
+            path = cache.path(f"scan_{cache.key(*tickers, top_n)}_{day}", "parquet")
+            out = cache.load(path, ttl=ttl)
+            if out is not None:
+                return out
+
+            out = fn(universe, top_n=top_n)
+            if not out.empty:
+                cache.save(path, out)
+            return out
+        return wrapper
+    return decorator
+
+def _download_ttl(period: str) -> int:
+    # Korte perioder (dagskurser) skal være friske; længere historik ændrer sig kun med nye bars
+    return 60*30 if period in ("1d", "5d") else 60*60*24
+
+def cached_download(tickers, period: str = "2y") -> pd.DataFrame:
+    """
+    yf.download med Parquet-cache på disk (cache.CACHE_DIR), nøglet på (tickers, period).
+    Genstart og andre processer genbruger kurshistorikken i stedet for at kalde Yahoo.
+    """
+    if isinstance(tickers, str):
+        tickers = [tickers]
+    tickers = sorted(set(tickers))
+
+    path = cache.path(f"yf_{cache.key(*tickers, period)}", "parquet")
+    df = cache.load(path, ttl=_download_ttl(period))
+    if df is not None:
+        return df
 
-    px = yf.download(
+    df = yf.download(
         tickers,
         period=period,
         auto_adjust=True,
         progress=False,
-    )["Close"]
+    )
+    if df is not None and not df.empty:
+        cache.save(path, df)
+    return df
+
+def download_close(tickers, period="2y") -> pd.DataFrame:
+    if not tickers:
+        return pd.DataFrame()
+
+    # Sorteret tuple: hashbar cache-nøgle, uafhængig af rækkefølge/dubletter
+    return _download_close_cached(tuple(sorted(set(tickers))), period)
+
+@st.cache_data(ttl=60*30, show_spinner=False)
+def _download_close_cached(tickers: tuple, period: str) -> pd.DataFrame:
+    """
+    Hukommelses-cache oven på Parquet-cachen, så reruns hverken rammer Yahoo eller disken.
+    TTL = korteste disk-TTL (1d/5d), så vi aldrig serverer ældre data end cached_download.
+    """
+    px = cached_download(list(tickers), period=period)["Close"]
 
     if isinstance(px, pd.Series):
         px = px.to_frame()
 
     return px.dropna(how="all")
 
+def _wilder_rma(x: np.ndarray, period: int) -> np.ndarray:
+    """
+    Wilders glatning (RMA) langs axis=0: første værdi er SMA af de første `period`,
+    derefter y[t] = y[t-1] + (x[t] - y[t-1]) / period – som ét lfilter-pass (IIR i C).
+    Ledende NaN (kortere historik) springes over pr. kolonne.
+    """
+    out = np.full(x.shape, np.nan)
+    alpha = 1.0 / period
+    first = np.argmax(~np.isnan(x), axis=0)
+    # Kolonner med samme startrække filtreres samlet
+    for start in np.unique(first):
+        cols = first == start
+        seg = x[start:, cols]
+        if len(seg) < period:
+            continue
+        seed = seg[:period].mean(axis=0)
+        out[start + period - 1, cols] = seed
+        out[start + period:, cols], _ = lfilter(
+            [alpha], [1.0, alpha - 1.0], seg[period:], axis=0, zi=((1 - alpha) * seed)[None, :]
+        )
+    return out
+
 def rsi(series: pd.Series, period: int = 14) -> pd.Series:
-    delta = series.diff()
-    gain = delta.clip(lower=0).rolling(period).mean()
-    loss = (-delta.clip(upper=0)).rolling(period).mean()
-    rs = gain / loss
-    return 100 - (100 / (1 + rs))
+    # Wilder-RSI; virker også på en hel DataFrame (én kolonne pr. ticker).
+    # ffill før diff: et internt hul (manglende bar) må ikke gøre lfilter-rekursionen
+    # NaN for resten af serien – kun ledende NaN er tilbage, og dem springer RMA over
+    delta = series.ffill().diff()
+    x = delta.to_numpy(dtype=float).reshape(len(delta), -1)
+    gain = _wilder_rma(np.clip(x, 0, None), period)
+    loss = _wilder_rma(np.clip(-x, 0, None), period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        r = 100 - (100 / (1 + gain / loss))
 
-def compute_signals(close_series: pd.Series) -> dict | None:
-    close = close_series.dropna()
-    if len(close) < 220:
-        return None
+    if isinstance(series, pd.DataFrame):
+        return pd.DataFrame(r, index=series.index, columns=series.columns)
+    return pd.Series(r[:, 0], index=series.index, name=series.name)
 
-    ma50 = close.rolling(50).mean()
-    ma200 = close.rolling(200).mean()
-    r = rsi(close)
+def _align_valid(close: pd.DataFrame) -> pd.DataFrame:
+    """
+    Bundjusterer hver tickers gyldige kurser, så sidste række er sidste kurs for alle.
+    Rullende beregninger på hele matrixen svarer så præcis til close[t].dropna() pr. ticker.
+    """
+    cols = [close[t].dropna().to_numpy(dtype=float) for t in close.columns]
+    n = max((len(v) for v in cols), default=0)
+    arr = np.full((n, len(cols)), np.nan)
+    for j, v in enumerate(cols):
+        if len(v):
+            arr[n - len(v):, j] = v
+    return pd.DataFrame(arr, columns=close.columns)
 
-    trend_up = ma50.iloc[-1] > ma200.iloc[-1]
-    rsi_now = float(r.iloc[-1])
-    rsi_prev = float(r.iloc[-6]) if len(r) > 6 else np.nan
+def _rolling_last(a: np.ndarray, window: int, how: str) -> np.ndarray:
+    """
+    Sidste række af et rullende vindue (mean/max/std) langs axis=0 –
+    som DataFrame.rolling(window).<how>().iloc[-1], men kun de sidste `window` rækker
+    reduceres (O(window) i stedet for et helt rullende vindue over historikken).
+    NaN i vinduet giver NaN, præcis som rolling med min_periods=window.
+    """
+    if len(a) < window:
+        return np.full(a.shape[1], np.nan)
+    tail = a[-window:]
+    if how == "std":
+        return tail.std(axis=0, ddof=1)
+    return getattr(tail, how)(axis=0)
 
-    vol = float(close.pct_change().rolling(20).std().iloc[-1] * 100)
-    dd = float((close.iloc[-1] / close.rolling(63).max().iloc[-1]) - 1)
+def compute_indicators(close: pd.DataFrame) -> pd.DataFrame:
+    """
+    Alle rullende indikatorer for hele universet i ét vektoriseret pass.
+    close skal have mindst én række.
+    Return: én række pr. ticker med sidste værdier (n, last, ma50, ma200, rsi_now, rsi_prev, vol, dd).
+    """
+    c = _align_valid(close)
+    r = rsi(c)
+    arr = c.to_numpy()
+    rets = c.pct_change().to_numpy()
 
-    if (not trend_up) or (dd < -0.15):
-        A = "🚨"
-    elif vol > 5:
-        A = "⚠️"
-    else:
-        A = "✅"
+    return pd.DataFrame({
+        "n": c.notna().sum(),
+        "last": c.iloc[-1],
+        "ma50": _rolling_last(arr, 50, "mean"),
+        "ma200": _rolling_last(arr, 200, "mean"),
+        "rsi_now": r.iloc[-1],
+        "rsi_prev": r.iloc[-6] if len(r) > 6 else np.nan,
+        "vol": _rolling_last(rets, 20, "std") * 100,
+        "dd": (arr[-1] / _rolling_last(arr, 63, "max")) - 1,
+    })
+
+def compute_signals_batch(close: pd.DataFrame) -> pd.DataFrame:
+    """
+    Signaler for alle tickers på én gang som kolonner (np.where i stedet for if/else pr. ticker).
+    Return: én række pr. ticker med mindst 220 kurser, index = ticker
+    (tom DataFrame hvis ingen ticker har nok historik).
+    """
+    # For kort/tom historik (fx afnoterede tickers) sorteres fra før indikatorerne
+    close = close.loc[:, close.notna().sum() >= 220]
+    if close.empty:
+        return pd.DataFrame(columns=SIGNAL_COLUMNS)
+
+    ind = compute_indicators(close)
+
+    last = ind["last"].to_numpy()
+    trend_up = (ind["ma50"] > ind["ma200"]).to_numpy()
+    rsi_now = ind["rsi_now"].to_numpy()
+    rsi_prev = ind["rsi_prev"].to_numpy()
+    vol = ind["vol"].to_numpy()
 
     buy_early = (
         trend_up
-        and (RSI_BUY_LOW < rsi_now < RSI_BUY_HIGH)
-        and (np.isfinite(rsi_prev) and rsi_now > rsi_prev)
+        & (RSI_BUY_LOW < rsi_now) & (rsi_now < RSI_BUY_HIGH)
+        & np.isfinite(rsi_prev) & (rsi_now > rsi_prev)
     )
-    B = "🟢" if buy_early else "❌"
+    B = np.where(buy_early, "🟢", "❌")
 
-    if rsi_now > RSI_TAKE_PROFIT:
-        C = "🟡 TAKE_PROFIT"
-    elif not trend_up:
-        C = "🔴 EXIT_RISK"
-    else:
-        C = "🔵 HOLD/ADD"
-
-    trend_score = 50 if trend_up else 15
-    mom_score = max(0, 30 - abs(rsi_now - 55))
-    stab_score = max(0, 20 - vol)
-    score = float(trend_score + mom_score + stab_score)
-
-    return {
-        "Score": round(score, 1),
-        "RSI": round(rsi_now, 1),
-        "Vol20": round(vol, 2),
-        "Drawdown3M": round(dd, 3),
-        "TrendUp": bool(trend_up),
+    # fmax: NaN tæller som 0 point (som max(0, nan) i skalar-udgaven)
+    trend_score = np.where(trend_up, 50, 15)
+    mom_score = np.fmax(0, 30 - np.abs(rsi_now - 55))
+    stab_score = np.fmax(0, 20 - vol)
+    score = trend_score + mom_score + stab_score
+
+    dd = ind["dd"].to_numpy()
+    A = np.where(~trend_up | (dd < -0.15), "🚨", np.where(vol > 5, "⚠️", "✅"))
+    C = np.where(
+        rsi_now > RSI_TAKE_PROFIT, "🟡 TAKE_PROFIT",
+        np.where(~trend_up, "🔴 EXIT_RISK", "🔵 HOLD/ADD"),
+    )
+
+    return pd.DataFrame({
+        "Score": np.round(score, 1),
+        "RSI": np.round(rsi_now, 1),
+        "Vol20": np.round(vol, 2),
+        "Drawdown3M": np.round(dd, 3),
+        "TrendUp": trend_up,
         "A_Risk": A,
         "B_Buy": B,
         "C_Timing": C,
-        "Last": round(float(close.iloc[-1]), 2),
-    }
+        "Last": np.round(last, 2),
+    }, index=ind.index)
+
+def compute_signals(close_series: pd.Series) -> dict | None:
+    close = close_series.dropna()
+    if len(close) < 220:
+        return None
+
+    sig = compute_signals_batch(close.to_frame())
+    if sig.empty:
+        return None
+    return sig.iloc[0].to_dict()
 
+@disk_cache(ttl=60*60*24)
 def screen_universe(universe, top_n: int = 10) -> pd.DataFrame:
     """
     universe kan være:
@@ -118,34 +285,33 @@ def screen_universe(universe, top_n: int = 10) -> pd.DataFrame:
     tickers = u["ticker"].tolist()
     close = download_close(tickers, period="2y")
 
-    rows = []
-    for _, row in u.iterrows():
-        t = row["ticker"]
-        name = row.get("name", "")
+    if close.empty:
+        return pd.DataFrame()
 
-        if close.empty or t not in close.columns:
-            continue
+    # Signaler for hele universet i ét pass, derefter i universets rækkefølge
+    sig = compute_signals_batch(close)
+    u = u[u["ticker"].isin(sig.index)]
+    if u.empty:
+        return pd.DataFrame()
+    sig = sig.loc[u["ticker"]]
 
-        sig = compute_signals(close[t])
-        if sig is None:
-            continue
+    buy = sig["B_Buy"].str.startswith("🟢").to_numpy()
+    take = sig["C_Timing"].str.startswith("🟡").to_numpy()
+    risk = sig["A_Risk"].isin(["⚠️", "🚨"]).to_numpy()
+    reasons = zip(
+        np.where(buy, "Buy-early: trend OK + RSI i buy-range og stigende", ""),
+        np.where(take, "Take profit: RSI høj", ""),
+        np.where(risk, "Risiko: vol/drawdown/trend-brud", ""),
+    )
+
+    out = sig.reset_index(drop=True)
+    out.insert(0, "Ticker", u["ticker"].to_numpy())
+    out.insert(1, "Navn", u["name"].to_numpy())
+    out["Hvorfor"] = [" | ".join(r for r in rs if r) or "Stærkt setup (score)" for rs in reasons]
+
+    return _rank(out, top_n)
 
-        reasons = []
-        if sig["B_Buy"].startswith("🟢"):
-            reasons.append("Buy-early: trend OK + RSI i buy-range og stigende")
-        if sig["C_Timing"].startswith("🟡"):
-            reasons.append("Take profit: RSI høj")
-        if sig["A_Risk"] in ["⚠️", "🚨"]:
-            reasons.append("Risiko: vol/drawdown/trend-brud")
-
-        rows.append({
-            "Ticker": t,
-            "Navn": name,
-            **sig,
-            "Hvorfor": " | ".join(reasons) if reasons else "Stærkt setup (score)"
-        })
-
-    out = pd.DataFrame(rows)
+def _rank(out: pd.DataFrame, top_n: int) -> pd.DataFrame:
     if out.empty:
         return out
 
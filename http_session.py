@@ -0,0 +1,18 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+def make_session() -> requests.Session:
+    """
+    Vedvarende session til vores egne HTTP-kald (Yahoo søgning/RSS, Wikipedia, STOXX):
+    keep-alive + pool, browser-User-Agent og retry med backoff på 429/5xx.
+    yfinance har sin egen session og skal ikke have denne.
+    """
+    s = requests.Session()
+    s.headers.update({"User-Agent": "Mozilla/5.0"})
+    s.mount("https://", HTTPAdapter(
+        pool_connections=32,
+        pool_maxsize=32,
+        max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[429, 500, 502, 503, 504], raise_on_status=False),
+    ))
+    return s
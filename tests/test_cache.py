@@ -0,0 +1,44 @@
+import os
+import time
+
+import pandas as pd
+
+import cache
+
+
+def test_json_roundtrip(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    p = cache.path("rss_" + cache.key("NVDA", 8), "json")
+    cache.save(p, [{"title": "Æ"}])
+    assert cache.load(p, ttl=60) == [{"title": "Æ"}]
+
+
+def test_parquet_roundtrip_keeps_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    df = pd.DataFrame({"Close": [1.0, 2.0]}, index=pd.to_datetime(["2024-01-02", "2024-01-03"]))
+    p = cache.path("yf_test", "parquet")
+    cache.save(p, df)
+    pd.testing.assert_frame_equal(cache.load(p), df, check_freq=False)
+
+
+def test_load_returns_none_when_missing_or_expired(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    p = cache.path("search_x", "json")
+    assert cache.load(p) is None
+    cache.save(p, ["x"])
+    old = time.time() - 120
+    os.utime(p, (old, old))
+    assert cache.load(p, ttl=60) is None
+
+
+def test_sweep_removes_only_old_files(tmp_path, monkeypatch):
+    monkeypatch.setattr(cache, "CACHE_DIR", str(tmp_path))
+    old_p = cache.path("theme_radar_2020-01-02_abc", "json")
+    new_p = cache.path("theme_radar_2024-01-02_abc", "json")
+    cache.save(old_p, [])
+    cache.save(new_p, [])
+    old = time.time() - cache.CACHE_RETENTION - 10
+    os.utime(old_p, (old, old))
+    cache.sweep()
+    assert not os.path.exists(old_p)
+    assert os.path.exists(new_p)
@@ -0,0 +1,36 @@
+import numpy as np
+import pandas as pd
+
+import engine
+
+
+def _prices(n: int) -> pd.Series:
+    rng = np.random.default_rng(0)
+    return pd.Series(100 * np.exp(np.cumsum(rng.normal(0, 0.01, n))))
+
+
+def test_compute_signals_returns_none_for_empty_series():
+    assert engine.compute_signals(pd.Series(dtype=float)) is None
+
+
+def test_compute_signals_returns_none_for_all_nan_series():
+    assert engine.compute_signals(pd.Series([np.nan] * 300)) is None
+
+
+def test_compute_signals_returns_none_for_short_series():
+    assert engine.compute_signals(_prices(219)) is None
+
+
+def test_compute_signals_batch_skips_short_columns():
+    close = pd.DataFrame({"OK": _prices(300), "DEAD": np.nan})
+    sig = engine.compute_signals_batch(close)
+    assert list(sig.index) == ["OK"]
+
+
+def test_rsi_recovers_after_internal_nan():
+    px = _prices(100)
+    px.iloc[50] = np.nan
+    r = engine.rsi(px)
+    assert np.isfinite(r.iloc[-1])
+    assert np.isfinite(r.iloc[52:]).all()
+
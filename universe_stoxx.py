@@ -1,17 +1,27 @@
 import re
 from datetime import datetime
 import requests
-import pdfplumber
-from io import BytesIO
+import pypdfium2 as pdfium
+
+import cache
+from http_session import make_session
+
+STOXX_CACHE_TTL = 60*60*24
 
 BASE = "https://www.stoxx.com/document/Reports/SelectionList/{year}/{monthname}/sl_sxxp_{yyyymm}.pdf"
 
+# Én session til alle STOXX-kald: keep-alive mellem HEAD-prober og PDF-GET + retry på 429/5xx
+HTTP_SESSION = make_session()
+
+# RIC-mønster (fx SAP.DE, NOVN.S) – kompileres én gang ved import
+RIC_RE = re.compile(r"\b[A-Z0-9\-/]+?\.[A-Z]{1,3}\b")
+
 MONTHNAMES = [
     "January","February","March","April","May","June",
     "July","August","September","October","November","December"
 ]
 
-def _try_download_latest_pdf(max_months_back: int = 18):
+def _candidate_urls(max_months_back: int):
     today = datetime.utcnow()
     y, m = today.year, today.month
 
@@ -24,9 +34,24 @@ def _try_download_latest_pdf(max_months_back: int = 18):
 
         monthname = MONTHNAMES[mm - 1]
         yyyymm = f"{yy}{mm:02d}"
-        url = BASE.format(year=yy, monthname=monthname, yyyymm=yyyymm)
+        yield BASE.format(year=yy, monthname=monthname, yyyymm=yyyymm)
 
-        r = requests.get(url, timeout=30)
+def _head_ok(url: str) -> bool:
+    try:
+        r = HTTP_SESSION.head(url, timeout=10, allow_redirects=True)
+    except requests.RequestException:
+        return False
+    if r.status_code == 405:  # HEAD ikke understøttet – lad GET afgøre det
+        return True
+    return r.status_code == 200 and "pdf" in r.headers.get("content-type","").lower()
+
+def _try_download_latest_pdf(max_months_back: int = 18):
+    # Nyeste måned først; HEAD-probe (ingen PDF-body for måneder der ikke findes)
+    # og stop ved første hit – normalt findes indeværende eller sidste måned
+    for url in _candidate_urls(max_months_back):
+        if not _head_ok(url):
+            continue
+        r = HTTP_SESSION.get(url, timeout=30)
         if r.status_code == 200 and "pdf" in r.headers.get("content-type","").lower():
             return url, r.content
 
@@ -46,29 +71,28 @@ def _ric_to_yahoo(ric: str):
     return ric
 
 def get_stoxx600_yahoo_tickers():
+    """
+    Returnerer (tickers, url). Resultatet gemmes på disk (.cache/stoxx_YYYYMM.json)
+    og genbruges i STOXX_CACHE_TTL, så en genstart ikke henter og parser PDF'en igen.
+    """
+    cache_path = cache.path(f"stoxx_{datetime.utcnow():%Y%m}", "json")
+    cached = cache.load(cache_path, ttl=STOXX_CACHE_TTL)
+    if cached is not None:
+        return cached["tickers"], cached["url"]
+
     url, pdf_bytes = _try_download_latest_pdf()
 
-    ric_pattern = re.compile(r"\b[A-Z0-9\-/]+?\.[A-Z]{1,3}\b")
-    rics = set()
-
-    with pdfplumber.open(BytesIO(pdf_bytes)) as pdf:
-        for page in pdf.pages:
-            text = page.extract_text() or ""
-            for ric in ric_pattern.findall(text):
-                rics.add(ric)
-
-    tickers = []
-    for ric in sorted(rics):
-        y = _ric_to_yahoo(ric)
-        if y:
-            tickers.append(y)
-
-    # Deduplicate while keeping order
-    seen = set()
-    out = []
-    for t in tickers:
-        if t not in seen:
-            seen.add(t)
-            out.append(t)
+    # pdfium (C) i stedet for pdfplumber/pdfminer – én tekststreng, ét regex-scan
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        text = "\n".join(page.get_textpage().get_text_range() for page in pdf)
+    finally:
+        pdf.close()
+    rics = {m.group(0) for m in RIC_RE.finditer(text)}
+
+    # Deduplicate while keeping order (single pass, first seen wins)
+    out = list(dict.fromkeys(y for y in map(_ric_to_yahoo, sorted(rics)) if y))
 
+    if out:
+        cache.save(cache_path, {"tickers": out, "url": url})
     return out, url
@@ -1,43 +1,71 @@
 import os
+from datetime import datetime, timezone
+from io import StringIO
+
 import pandas as pd
-import requests
+import streamlit as st
+
+import cache
+from http_session import make_session
 
 WIKI_SP500 = "https://en.wikipedia.org/wiki/List_of_S%26P_500_companies"
 FALLBACK_CSV = "data/sp500.csv"
+SP500_CACHE_TTL = 60*60*24*30
+
+HTTP_SESSION = make_session()
+
+@st.cache_data(ttl=24*3600, show_spinner=False)
+def load_csv_universe(path: str) -> pd.DataFrame:
+    """
+    Indlæser et univers (ticker, name) fra CSV'en i data/ – den eneste kilde.
+    """
+    # Arrow CSV-parseren er multitrådet; fald tilbage til C-engine hvis pyarrow mangler.
+    # Standard-dtypes i begge grene, så resultatet ser ens ud uanset parser
+    try:
+        df = pd.read_csv(path, engine="pyarrow")
+    except (ImportError, ValueError):
+        df = pd.read_csv(path)
+    if "ticker" not in df.columns:
+        return pd.DataFrame(columns=["ticker", "name"])
+    if "name" not in df.columns:
+        df["name"] = ""
+    return df[["ticker", "name"]].dropna().drop_duplicates(subset=["ticker"])
 
 def get_sp500_universe():
     """
     Returnerer (df, status_message)
     df har kolonner: ticker, name
     Fejler Wikipedia, returneres fallback CSV hvis den findes – ellers tom df.
+    Medlemslisten ændrer sig kvartalsvis, så et vellykket scrape gemmes på disk
+    (.cache/sp500_YYYY-MM.parquet) og genbruges i SP500_CACHE_TTL.
     """
+    cache_path = cache.path(f"sp500_{datetime.now(timezone.utc):%Y-%m}", "parquet")
+    cached = cache.load(cache_path, ttl=SP500_CACHE_TTL)
+    if cached is not None:
+        return cached, "S&P500 hentet fra disk-cache."
+
     try:
-        r = requests.get(
-            WIKI_SP500,
-            timeout=20,
-            headers={"User-Agent": "Mozilla/5.0"},
-        )
+        r = HTTP_SESSION.get(WIKI_SP500, timeout=20)
         # ikke raise_for_status() (den crasher Streamlit)
         if r.status_code != 200:
             raise RuntimeError(f"Wikipedia HTTP {r.status_code}")
 
-        tables = pd.read_html(r.text)
+        # StringIO: literal HTML-strenge til read_html er deprecated (FutureWarning)
+        tables = pd.read_html(StringIO(r.text))
         df = tables[0].copy()
         df = df.rename(columns={"Symbol": "ticker", "Security": "name"})
         df["ticker"] = df["ticker"].astype(str).str.replace(".", "-", regex=False)  # BRK.B -> BRK-B
         df["name"] = df["name"].astype(str)
 
         out = df[["ticker", "name"]].dropna().drop_duplicates(subset=["ticker"])
+        cache.save(cache_path, out)
         return out, "S&P500 hentet fra Wikipedia (cachet)."
 
     except Exception as e:
         if os.path.exists(FALLBACK_CSV):
-            df = pd.read_csv(FALLBACK_CSV)
-            if "ticker" in df.columns:
-                if "name" not in df.columns:
-                    df["name"] = ""
-                df = df[["ticker", "name"]].dropna().drop_duplicates(subset=["ticker"])
-                return df, f"S&P500 hentet fra fallback CSV (Wikipedia fejlede: {e})"
+            df = load_csv_universe(FALLBACK_CSV)
+            if not df.empty:
+                return df, f"S&P500 hentet fra fallback (Wikipedia fejlede: {e})"
 
         empty = pd.DataFrame(columns=["ticker", "name"])
         return empty, f"S&P500 kunne ikke hentes lige nu (Wikipedia fejlede: {e})."